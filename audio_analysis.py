@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Audio analysis shared by generate_show.py and generate_show_measures.py:
+tempo/beat detection, the energy envelope, and energy-based pattern choice.
+Requires: librosa, numpy, threadpoolctl
+"""
+
+import os
+import hashlib
+import tempfile
+import zipfile
+import librosa
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+# Audio is analyzed at a reduced sample rate: BPM and the energy envelope
+# don't need full bandwidth, and every downstream array shrinks with it.
+ANALYSIS_SR = 11025
+
+# Bump when analyze_audio's output changes so stale cached results are ignored
+ANALYSIS_VERSION = 2
+
+# Use the fastest resampler available (soxr ships with librosa)
+try:
+    import soxr  # noqa: F401
+    RES_TYPE = "soxr_qq"
+except ImportError:
+    RES_TYPE = "kaiser_fast"
+
+# Optional SIMD (AVX2/NEON) RMS kernel, preferred for the energy envelope
+try:
+    import numpy_rms
+except ImportError:
+    numpy_rms = None
+
+# Numba (installed alongside librosa) compiles the RMS kernel to native code.
+# The compiled kernel is cached on disk, so batch runs only pay for it once.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Random source for pattern selection
+rng = np.random.default_rng()
+
+
+def reseed_rng():
+    """
+    Give rng fresh OS entropy. Forked batch workers inherit the parent's
+    state, so each one calls this to avoid drawing identical sequences.
+    The Generator is reseeded in place so modules that imported rng by
+    name see the new state too.
+    """
+    rng.bit_generator.state = np.random.default_rng().bit_generator.state
+
+
+def init_batch_worker():
+    """
+    Pool initializer for batch mode. Batch mode already runs one analysis
+    per core, so each worker keeps numpy/librosa's thread pools to a single
+    thread, and draws from its own random stream.
+    """
+    threadpool_limits(1)
+    reseed_rng()
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _rms_njit(y, frame_length, hop_length):
+        """RMS of each hop_length-spaced frame of an already padded signal."""
+        n = 1 + (len(y) - frame_length) // hop_length
+        out = np.empty(n, np.float32)
+        for i in range(n):
+            base = i * hop_length
+            total = 0.0
+            for j in range(frame_length):
+                v = y[base + j]
+                total += v * v
+            out[i] = np.sqrt(total / frame_length)
+        return out
+else:
+    _rms_njit = None
+
+
+def _blocked_rms(y, frame_length, hop_length):
+    """
+    RMS of each hop_length-spaced frame of an already padded signal, built
+    from numpy_rms's non-overlapping block RMS: a frame's mean square is the
+    average of the frame_length // hop_length blocks it spans.
+    """
+    n_blocks = len(y) // hop_length
+    y = np.ascontiguousarray(y[:n_blocks * hop_length], dtype=np.float32)
+    blocks = numpy_rms.rms(y, hop_length)
+    k = frame_length // hop_length
+    mean_sq = np.convolve(np.square(blocks), np.full(k, 1.0 / k, dtype=np.float32), mode='valid')
+    return np.sqrt(mean_sq)
+
+
+def _fast_rms(y, frame_length=2048, hop_length=512):
+    """
+    Frame-wise RMS energy, equivalent to librosa.feature.rms (centered,
+    zero-padded frames) but computed directly on y. Uses numpy_rms or the
+    Numba kernel when available and a strided NumPy view otherwise.
+    """
+    y = np.pad(y, frame_length // 2)
+    if numpy_rms is not None and frame_length % hop_length == 0:
+        return _blocked_rms(y, frame_length, hop_length)
+    if _rms_njit is not None:
+        return _rms_njit(y, frame_length, hop_length)
+    frames = np.lib.stride_tricks.sliding_window_view(y, frame_length)[::hop_length]
+    return np.sqrt(np.square(frames, dtype=np.float32).mean(axis=1))
+
+
+def analyze_audio(audio_path):
+    """
+    Analyze audio file and return useful features:
+    - tempo (BPM)
+    - beat times
+    - energy profile over time
+    """
+    print(f"Loading audio file: {audio_path}")
+    y, sr = librosa.load(audio_path, sr=ANALYSIS_SR, mono=True, res_type=RES_TYPE)
+    duration = librosa.get_duration(y=y, sr=sr)
+    
+    print(f"Duration: {duration:.2f} seconds")
+    print("Analyzing tempo and beats...")
+    
+    # Onset envelope and energy envelope share one frame grid. Scale the hop
+    # with the sample rate to keep librosa's ~43 frames/s: beat_track picks
+    # tempo from whole-frame lags, so a coarser grid coarsens the BPM too.
+    hop_length = 512 * ANALYSIS_SR // 22050
+    
+    # Detect tempo and beats
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
+    beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=hop_length)
+    
+    # Convert tempo to scalar if it's an array
+    if isinstance(tempo, np.ndarray):
+        tempo = float(tempo.item())
+    else:
+        tempo = float(tempo)
+    
+    print(f"Detected tempo: {tempo:.1f} BPM")
+    print(f"Found {len(beat_times)} beats")
+    
+    # Calculate energy over time (RMS)
+    print("Calculating energy profile...")
+    rms = _fast_rms(y, hop_length=hop_length)
+    del y  # nothing downstream needs the decoded audio
+    times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop_length)
+    
+    # Normalize energy to 0-1 range
+    rms_norm = (rms - rms.min()) / (rms.max() - rms.min())
+    
+    # Keep both envelope arrays in one compact float32 layout for lookups
+    times = np.ascontiguousarray(times, dtype=np.float32)
+    rms_norm = np.ascontiguousarray(rms_norm, dtype=np.float32)
+    
+    return {
+        'duration': duration,
+        'tempo': tempo,
+        'beat_times': beat_times,
+        'energy': rms_norm,
+        'energy_times': times
+    }
+
+
+def cached_analyze_audio(audio_path):
+    """
+    Same as analyze_audio, but reuses a previous result for this file if one
+    is cached in the temp directory (keyed by path, modification time and
+    the analysis settings). An unreadable cache entry is replaced.
+    """
+    key_src = (f"{os.path.abspath(audio_path)}:{os.path.getmtime(audio_path)}:"
+               f"v{ANALYSIS_VERSION}:{ANALYSIS_SR}:{RES_TYPE}")
+    key = hashlib.sha1(key_src.encode()).hexdigest()
+    cache_path = os.path.join(tempfile.gettempdir(), f"showgen_{key}.npz")
+    
+    if os.path.exists(cache_path):
+        try:
+            with np.load(cache_path) as cached:
+                analysis = {k: v.item() if v.ndim == 0 else v for k, v in cached.items()}
+            print(f"Using cached analysis: {cache_path}")
+            return analysis
+        except (OSError, ValueError, zipfile.BadZipFile):
+            # Unreadable entry (corrupt, or from an incompatible numpy):
+            # drop it and analyze again
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+    
+    analysis = analyze_audio(audio_path)
+    
+    # Write to a temp file first so an interrupted run never leaves a
+    # truncated cache entry behind. Caching is best-effort.
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **analysis)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    return analysis
+
+
+def get_energy_at_time(analysis, t):
+    """
+    Get normalized energy level at a specific time.
+    t may also be an array of times, in which case an array is returned.
+    """
+    times = analysis['energy_times']
+    # Match the query dtype so searchsorted doesn't upcast the whole array
+    idx = np.searchsorted(times, np.asarray(t, dtype=times.dtype))
+    idx = np.minimum(idx, len(analysis['energy']) - 1)
+    return analysis['energy'][idx]
+
+
+# Candidate patterns for each energy level
+_LOW = ("sparkle", "wave_trees")
+_MED = ("alternate_trees_and_bulbs", "chase_bulbs", "wave_trees")
+_HIGH = ("blink_all", "alternate_trees_and_bulbs", "chase_bulbs")
+
+# Option builders per pattern, called as builder(beat_duration, energy)
+_OPT_BUILDERS = {
+    # Faster sparkle for higher energy
+    "sparkle": lambda beat, energy: {
+        'interval': max(0.06, 0.15 - (energy * 0.09)),
+        'on_fraction': min(0.8, 0.3 + (energy * 0.5)),
+    },
+    # Sync to beat
+    "wave_trees": lambda beat, energy: {'step_interval': beat / 2},
+    "alternate_trees_and_bulbs": lambda beat, energy: {'interval': beat / 2},
+    # Sync to beat, faster for high energy
+    "blink_all": lambda beat, energy: {'interval': beat / (2 if energy > 0.7 else 1.5)},
+    # Faster chase for higher energy
+    "chase_bulbs": lambda beat, energy: {'step_interval': beat / 4},
+    # Rapid strobe
+    "finale_flash": lambda beat, energy: {'interval': 0.10},
+}
+
+
+def select_pattern_for_energy(energy, prev_pattern=None, r=None):
+    """
+    Select a pattern based on energy level.
+    Avoid repeating the same pattern consecutively.
+    r is a uniform random number in [0, 1); one is drawn if not given.
+    """
+    if energy < 0.3:
+        candidates = _LOW
+    elif energy < 0.6:
+        candidates = _MED
+    else:
+        candidates = _HIGH
+    
+    # Remove previous pattern if possible to add variety
+    if prev_pattern in candidates:
+        candidates = tuple(p for p in candidates if p != prev_pattern)
+    
+    if r is None:
+        r = rng.random()
+    return candidates[int(r * len(candidates))]
+
+
+def get_pattern_options(pattern, beat_duration, energy):
+    """
+    Generate appropriate options for a pattern based on beat length
+    (seconds per beat) and energy.
+    """
+    builder = _OPT_BUILDERS.get(pattern)
+    if builder is None:
+        return {}
+    return builder(beat_duration, energy)
@@ -8,9 +8,25 @@ Install with: pip3 install librosa numpy pyyaml
 
 import sys
 import os
-import librosa
+import glob
+import multiprocessing as mp
+from functools import partial
+
 import numpy as np
-import yaml
+from audio_analysis import (
+    cached_analyze_audio,
+    get_energy_at_time,
+    get_pattern_options,
+    init_batch_worker,
+    rng,
+    select_pattern_for_energy,
+)
+from show_files import (
+    check_unique_show_names,
+    find_audio_files,
+    show_filename,
+    write_show_yaml,
+)
 
 # Available patterns from patterns.py
 PATTERNS = [
@@ -32,139 +48,30 @@ PATTERN_INTENSITY = {
     "finale_flash": 2
 }
 
-def analyze_audio(audio_path):
-    """
-    Analyze audio file and return useful features:
-    - tempo (BPM)
-    - beat times
-    - energy profile over time
-    """
-    print(f"Loading audio file: {audio_path}")
-    y, sr = librosa.load(audio_path)
-    duration = librosa.get_duration(y=y, sr=sr)
-    
-    print(f"Duration: {duration:.2f} seconds")
-    print("Analyzing tempo and beats...")
-    
-    # Detect tempo and beats
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-    
-    # Convert tempo to scalar if it's an array
-    if isinstance(tempo, np.ndarray):
-        tempo = float(tempo.item())
-    else:
-        tempo = float(tempo)
-    
-    print(f"Detected tempo: {tempo:.1f} BPM")
-    print(f"Found {len(beat_times)} beats")
-    
-    # Calculate energy over time (RMS)
-    print("Calculating energy profile...")
-    hop_length = 512
-    rms = librosa.feature.rms(y=y, hop_length=hop_length)[0]
-    times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop_length)
-    
-    # Normalize energy to 0-1 range
-    rms_norm = (rms - rms.min()) / (rms.max() - rms.min())
-    
-    return {
-        'duration': duration,
-        'tempo': tempo,
-        'beat_times': beat_times,
-        'energy': rms_norm,
-        'energy_times': times,
-        'sr': sr,
-        'y': y
-    }
-
-def get_energy_at_time(analysis, t):
-    """Get normalized energy level at a specific time."""
-    idx = np.searchsorted(analysis['energy_times'], t)
-    if idx >= len(analysis['energy']):
-        idx = len(analysis['energy']) - 1
-    return analysis['energy'][idx]
-
-def select_pattern_for_energy(energy, prev_pattern=None):
-    """
-    Select a pattern based on energy level.
-    Avoid repeating the same pattern consecutively.
-    """
-    if energy < 0.3:
-        # Low energy - calm patterns
-        candidates = ["sparkle", "wave_trees"]
-    elif energy < 0.6:
-        # Medium energy
-        candidates = ["alternate_trees_and_bulbs", "chase_bulbs", "wave_trees"]
-    else:
-        # High energy
-        candidates = ["blink_all", "alternate_trees_and_bulbs", "chase_bulbs"]
-    
-    # Remove previous pattern if possible to add variety
-    if prev_pattern in candidates and len(candidates) > 1:
-        candidates = [p for p in candidates if p != prev_pattern]
-    
-    return np.random.choice(candidates)
-
-def get_pattern_options(pattern, tempo, energy):
-    """
-    Generate appropriate options for a pattern based on tempo and energy.
-    """
-    # Calculate interval based on tempo (60s / BPM = seconds per beat)
-    beat_duration = 60.0 / tempo
-    
-    options = {}
-    
-    if pattern == "sparkle":
-        # Faster sparkle for higher energy
-        options['interval'] = float(max(0.06, 0.15 - (energy * 0.09)))
-        options['on_fraction'] = float(min(0.8, 0.3 + (energy * 0.5)))
-    
-    elif pattern == "wave_trees":
-        # Sync to beat
-        options['step_interval'] = float(beat_duration / 2)
-    
-    elif pattern == "alternate_trees_and_bulbs":
-        # Sync to beat
-        options['interval'] = float(beat_duration / 2)
-    
-    elif pattern == "blink_all":
-        # Sync to beat, faster for high energy
-        options['interval'] = float(beat_duration / (2 if energy > 0.7 else 1.5))
-    
-    elif pattern == "chase_bulbs":
-        # Faster chase for higher energy
-        options['step_interval'] = float(beat_duration / 4)
-    
-    elif pattern == "finale_flash":
-        # Rapid strobe
-        options['interval'] = 0.10
-    
-    return options
-
 def detect_sections(analysis, section_length=12.0):
     """
     Divide the song into sections based on energy changes.
     """
     duration = analysis['duration']
+    beat_duration = 60.0 / analysis['tempo']  # seconds per beat
     sections = []
-    
-    # Start at 0
-    current_time = 0.0
     prev_pattern = None
     
-    while current_time < duration:
-        # Calculate section end
-        section_end = min(current_time + section_length, duration)
-        
-        # Get average energy for this section
-        section_energy = get_energy_at_time(analysis, (current_time + section_end) / 2)
-        
+    # Section boundaries, starting at 0
+    starts = np.arange(0.0, duration, section_length)
+    ends = np.minimum(starts + section_length, duration)
+    
+    # Energy at every section midpoint in one lookup
+    energies = get_energy_at_time(analysis, (starts + ends) / 2)
+    rand = rng.random(len(energies))  # one pattern-choice draw per section
+    
+    for current_time, section_end, section_energy, r in zip(
+            starts.tolist(), ends.tolist(), energies.tolist(), rand.tolist()):
         # Select pattern
-        pattern = select_pattern_for_energy(section_energy, prev_pattern)
+        pattern = select_pattern_for_energy(section_energy, prev_pattern, r)
         
         # Get pattern options
-        options = get_pattern_options(pattern, analysis['tempo'], section_energy)
+        options = get_pattern_options(pattern, beat_duration, section_energy)
         
         sections.append({
             'start': round(current_time, 1),
@@ -174,7 +81,6 @@ def detect_sections(analysis, section_length=12.0):
         })
         
         prev_pattern = pattern
-        current_time = section_end
     
     return sections
 
@@ -189,10 +95,8 @@ def detect_finale(analysis, finale_duration=15.0):
         return None
     
     # Check if final section has sustained high energy
-    finale_times = analysis['energy_times'][analysis['energy_times'] >= finale_start]
-    finale_energies = analysis['energy'][len(analysis['energy']) - len(finale_times):]
-    
-    avg_finale_energy = np.mean(finale_energies)
+    start_idx = np.searchsorted(analysis['energy_times'], finale_start)
+    avg_finale_energy = float(analysis['energy'][start_idx:].mean())
     
     # If finale is energetic enough, create special finale sections
     if avg_finale_energy > 0.65:
@@ -205,7 +109,7 @@ def generate_show(audio_path, output_yaml, section_length=12.0):
     Main function to generate a light show YAML from an audio file.
     """
     # Analyze audio
-    analysis = analyze_audio(audio_path)
+    analysis = cached_analyze_audio(audio_path)
     
     # Generate sections
     print(f"Generating sections ({section_length}s each)...")
@@ -227,14 +131,14 @@ def generate_show(audio_path, output_yaml, section_length=12.0):
             'start': round(finale_start, 1),
             'end': round(finale_start + 8.0, 1),
             'pattern': 'blink_all',
-            'options': {'interval': float(beat_duration / 2)}
+            'options': {'interval': beat_duration / 2}
         })
         
         sections.append({
             'start': round(finale_start + 8.0, 1),
             'end': round(finale_start + 12.0, 1),
             'pattern': 'alternate_trees_and_bulbs',
-            'options': {'interval': float(beat_duration / 3)}
+            'options': {'interval': beat_duration / 3}
         })
         
         # Final explosion
@@ -259,38 +163,77 @@ def generate_show(audio_path, output_yaml, section_length=12.0):
         f.write(f"# Auto-generated light show for {audio_filename}\n")
         f.write(f"# Duration: {analysis['duration']:.2f}s, Tempo: {analysis['tempo']:.1f} BPM\n")
         f.write(f"# Generated with {len(sections)} sections\n\n")
-        yaml.dump(show, f, default_flow_style=False, sort_keys=False)
+        write_show_yaml(f, show)
     
     print(f"✓ Show generated successfully!")
     print(f"  Sections: {len(sections)}")
     print(f"  Total duration: {analysis['duration']:.2f}s")
     print(f"\nRun with: python3 show_runner.py {output_yaml}")
 
-if __name__ == "__main__":
+def _generate_one(audio_path, output_dir, section_length):
+    """Batch worker: write <name>_show.yaml for one audio file into output_dir."""
+    output_yaml = os.path.join(output_dir, show_filename(audio_path))
+    generate_show(audio_path, output_yaml, section_length=section_length)
+    return output_yaml
+
+def generate_shows(audio_files, output_dir=".", section_length=12.0):
+    """
+    Generate shows for several audio files in parallel,
+    one worker process per CPU core. Raises ValueError if two files
+    would write the same show file.
+    """
+    worker = partial(_generate_one, output_dir=output_dir, section_length=section_length)
+    check_unique_show_names(audio_files)
+    with mp.Pool(initializer=init_batch_worker) as pool:
+        for output_yaml in pool.imap_unordered(worker, audio_files):
+            print(f"✓ Wrote {output_yaml}")
+
+def main():
     if len(sys.argv) < 2:
         print("Usage: python3 generate_show.py <audio_file.mp3> [output.yaml] [section_length]")
+        print("       python3 generate_show.py <directory|'glob'> [output_dir] [section_length]")
         print("\nExamples:")
         print("  python3 generate_show.py sarajevo.mp3")
         print("  python3 generate_show.py sarajevo.mp3 my_show.yaml")
         print("  python3 generate_show.py sarajevo.mp3 my_show.yaml 10")
+        print("  python3 generate_show.py songs/ shows/")
+        print("  python3 generate_show.py 'songs/*.mp3' shows/ 10")
         sys.exit(1)
     
     audio_file = sys.argv[1]
     
-    # Default output name based on input
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
-    else:
-        base = os.path.splitext(os.path.basename(audio_file))[0]
-        output_file = f"{base}_show.yaml"
-    
     # Optional section length
     section_length = 12.0
     if len(sys.argv) >= 4:
         section_length = float(sys.argv[3])
     
+    # Batch mode: a directory or glob pattern of audio files
+    if os.path.isdir(audio_file) or glob.has_magic(audio_file):
+        audio_files = find_audio_files(audio_file)
+        if not audio_files:
+            print(f"Error: No audio files found for: {audio_file}")
+            sys.exit(1)
+        output_dir = sys.argv[2] if len(sys.argv) >= 3 else "."
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Generating {len(audio_files)} shows into {output_dir}...")
+        try:
+            generate_shows(audio_files, output_dir, section_length=section_length)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+    
+    # Default output name based on input
+    if len(sys.argv) >= 3:
+        output_file = sys.argv[2]
+    else:
+        output_file = show_filename(audio_file)
+    
     if not os.path.exists(audio_file):
         print(f"Error: Audio file not found: {audio_file}")
         sys.exit(1)
     
-    generate_show(audio_file, output_file, section_length=section_length)
\ No newline at end of file
+    generate_show(audio_file, output_file, section_length=section_length)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
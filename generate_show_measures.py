@@ -6,9 +6,25 @@ Outputs sections in measures instead of seconds for easier musical editing.
 
 import sys
 import os
-import librosa
+import glob
+import multiprocessing as mp
+from functools import partial
+
 import numpy as np
-import yaml
+from audio_analysis import (
+    cached_analyze_audio,
+    get_energy_at_time,
+    get_pattern_options,
+    init_batch_worker,
+    rng,
+    select_pattern_for_energy,
+)
+from show_files import (
+    check_unique_show_names,
+    find_audio_files,
+    show_filename,
+    write_show_yaml,
+)
 
 # Available patterns
 PATTERNS = [
@@ -21,48 +37,6 @@ PATTERNS = [
 ]
 
 
-def analyze_audio(audio_path):
-    """Analyze audio file and return tempo, beats, energy, etc."""
-    print(f"Loading audio file: {audio_path}")
-    y, sr = librosa.load(audio_path)
-    duration = librosa.get_duration(y=y, sr=sr)
-    
-    print(f"Duration: {duration:.2f} seconds")
-    print("Analyzing tempo and beats...")
-    
-    # Detect tempo and beats
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-    
-    # Convert tempo to scalar if it's an array
-    if isinstance(tempo, np.ndarray):
-        tempo = float(tempo.item())
-    else:
-        tempo = float(tempo)
-    
-    print(f"Detected tempo: {tempo:.1f} BPM")
-    print(f"Found {len(beat_times)} beats")
-    
-    # Calculate energy over time (RMS)
-    print("Calculating energy profile...")
-    hop_length = 512
-    rms = librosa.feature.rms(y=y, hop_length=hop_length)[0]
-    times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop_length)
-    
-    # Normalize energy to 0-1 range
-    rms_norm = (rms - rms.min()) / (rms.max() - rms.min())
-    
-    return {
-        'duration': duration,
-        'tempo': tempo,
-        'beat_times': beat_times,
-        'energy': rms_norm,
-        'energy_times': times,
-        'sr': sr,
-        'y': y
-    }
-
-
 def seconds_to_measures(seconds, bpm, beats_per_measure=4):
     """Convert seconds to measures."""
     beats = (seconds * bpm) / 60.0
@@ -77,81 +51,37 @@ def measures_to_seconds(measures, bpm, beats_per_measure=4):
     return seconds
 
 
-def get_energy_at_time(analysis, t):
-    """Get normalized energy level at a specific time."""
-    idx = np.searchsorted(analysis['energy_times'], t)
-    if idx >= len(analysis['energy']):
-        idx = len(analysis['energy']) - 1
-    return analysis['energy'][idx]
-
-
-def select_pattern_for_energy(energy, prev_pattern=None):
-    """Select a pattern based on energy level."""
-    if energy < 0.3:
-        candidates = ["sparkle", "wave_trees"]
-    elif energy < 0.6:
-        candidates = ["alternate_trees_and_bulbs", "chase_bulbs", "wave_trees"]
-    else:
-        candidates = ["blink_all", "alternate_trees_and_bulbs", "chase_bulbs"]
-    
-    if prev_pattern in candidates and len(candidates) > 1:
-        candidates = [p for p in candidates if p != prev_pattern]
-    
-    return np.random.choice(candidates)
-
-
-def get_pattern_options(pattern, tempo, energy):
-    """Generate appropriate options for a pattern based on tempo and energy."""
-    beat_duration = 60.0 / tempo
-    options = {}
-    
-    if pattern == "sparkle":
-        options['interval'] = float(max(0.06, 0.15 - (energy * 0.09)))
-        options['on_fraction'] = float(min(0.8, 0.3 + (energy * 0.5)))
-    elif pattern == "wave_trees":
-        options['step_interval'] = float(beat_duration / 2)
-    elif pattern == "alternate_trees_and_bulbs":
-        options['interval'] = float(beat_duration / 2)
-    elif pattern == "blink_all":
-        options['interval'] = float(beat_duration / (2 if energy > 0.7 else 1.5))
-    elif pattern == "chase_bulbs":
-        options['step_interval'] = float(beat_duration / 4)
-    elif pattern == "finale_flash":
-        options['interval'] = 0.10
-    
-    return options
-
-
 def detect_sections(analysis, section_measures=8, beats_per_measure=4):
     """
     Divide the song into sections based on measures.
     """
     duration = analysis['duration']
     tempo = analysis['tempo']
+    beat_duration = 60.0 / tempo  # seconds per beat
     
     sections = []
-    current_measure = 0
     prev_pattern = None
     
     # Calculate total measures in song
     total_measures = int(seconds_to_measures(duration, tempo, beats_per_measure))
     
-    while current_measure < total_measures:
-        # Calculate section end
-        end_measure = min(current_measure + section_measures, total_measures)
-        
-        # Convert to seconds for energy analysis
-        current_time = measures_to_seconds(current_measure, tempo, beats_per_measure)
-        end_time = measures_to_seconds(end_measure, tempo, beats_per_measure)
-        
-        # Get average energy for this section
-        section_energy = get_energy_at_time(analysis, (current_time + end_time) / 2)
-        
+    # Section boundaries in measures
+    start_measures = np.arange(0, total_measures, section_measures)
+    end_measures = np.minimum(start_measures + section_measures, total_measures)
+    
+    # Energy at every section midpoint, converted to seconds, in one lookup
+    start_times = measures_to_seconds(start_measures, tempo, beats_per_measure)
+    end_times = measures_to_seconds(end_measures, tempo, beats_per_measure)
+    energies = get_energy_at_time(analysis, (start_times + end_times) / 2)
+    rand = rng.random(len(energies))  # one pattern-choice draw per section
+    
+    for current_measure, end_measure, section_energy, r in zip(
+            start_measures.tolist(), end_measures.tolist(), energies.tolist(), rand.tolist()):
         # Select pattern
-        pattern = select_pattern_for_energy(section_energy, prev_pattern)
+        pattern = select_pattern_for_energy(section_energy, prev_pattern, r)
         
         # Get pattern options
-        options = get_pattern_options(pattern, tempo, section_energy)
+        options = get_pattern_options(pattern, beat_duration, section_energy)
         
         sections.append({
             'start_measure': int(current_measure),
@@ -161,7 +91,6 @@ def detect_sections(analysis, section_measures=8, beats_per_measure=4):
         })
         
         prev_pattern = pattern
-        current_measure = end_measure
     
     return sections
 
@@ -178,10 +107,8 @@ def detect_finale(analysis, finale_measures=32, beats_per_measure=4):
         return None
     
     # Check if final section has sustained high energy
-    finale_times = analysis['energy_times'][analysis['energy_times'] >= finale_start_seconds]
-    finale_energies = analysis['energy'][len(analysis['energy']) - len(finale_times):]
-    
-    avg_finale_energy = np.mean(finale_energies)
+    start_idx = np.searchsorted(analysis['energy_times'], finale_start_seconds)
+    avg_finale_energy = float(analysis['energy'][start_idx:].mean())
     
     if avg_finale_energy > 0.65:
         finale_start_measure = int(seconds_to_measures(finale_start_seconds, tempo, beats_per_measure))
@@ -193,7 +120,7 @@ def detect_finale(analysis, finale_measures=32, beats_per_measure=4):
 def generate_show(audio_path, output_yaml, section_measures=8, beats_per_measure=4):
     """Main function to generate a measure-based light show YAML."""
     # Analyze audio
-    analysis = analyze_audio(audio_path)
+    analysis = cached_analyze_audio(audio_path)
     tempo = analysis['tempo']
     
     print(f"\nGenerating sections ({section_measures} measures each)...")
@@ -219,7 +146,7 @@ def generate_show(audio_path, output_yaml, section_measures=8, beats_per_measure
             'start_measure': finale_start_measure,
             'end_measure': finale_start_measure + 16,
             'pattern': 'blink_all',
-            'options': {'interval': float(beat_duration / 2)}
+            'options': {'interval': beat_duration / 2}
         })
         
         # Intense section (8 measures)
@@ -227,7 +154,7 @@ def generate_show(audio_path, output_yaml, section_measures=8, beats_per_measure
             'start_measure': finale_start_measure + 16,
             'end_measure': finale_start_measure + 24,
             'pattern': 'alternate_trees_and_bulbs',
-            'options': {'interval': float(beat_duration / 3)}
+            'options': {'interval': beat_duration / 3}
         })
         
         # Final explosion (remaining measures)
@@ -258,7 +185,7 @@ def generate_show(audio_path, output_yaml, section_measures=8, beats_per_measure
         f.write(f"# Time signature: {beats_per_measure}/4\n")
         f.write(f"# Total measures: {total_measures}\n")
         f.write(f"# Generated with {len(sections)} sections\n\n")
-        yaml.dump(show, f, default_flow_style=False, sort_keys=False)
+        write_show_yaml(f, show)
     
     print(f"✓ Show generated successfully!")
     print(f"  Sections: {len(sections)}")
@@ -267,24 +194,39 @@ def generate_show(audio_path, output_yaml, section_measures=8, beats_per_measure
     print(f"\nRun with: python3 show_runner_measures.py {output_yaml}")
 
 
-if __name__ == "__main__":
+def _generate_one(audio_path, output_dir, section_measures, beats_per_measure):
+    """Batch worker: write <name>_show.yaml for one audio file into output_dir."""
+    output_yaml = os.path.join(output_dir, show_filename(audio_path))
+    generate_show(audio_path, output_yaml, section_measures, beats_per_measure)
+    return output_yaml
+
+
+def generate_shows(audio_files, output_dir=".", section_measures=8, beats_per_measure=4):
+    """
+    Generate shows for several audio files in parallel, one process per core.
+    Raises ValueError if two files would write the same show file.
+    """
+    worker = partial(_generate_one, output_dir=output_dir,
+                     section_measures=section_measures, beats_per_measure=beats_per_measure)
+    check_unique_show_names(audio_files)
+    with mp.Pool(initializer=init_batch_worker) as pool:
+        for output_yaml in pool.imap_unordered(worker, audio_files):
+            print(f"✓ Wrote {output_yaml}")
+
+
+def main():
     if len(sys.argv) < 2:
         print("Usage: python3 generate_show_measures.py <audio_file.mp3> [output.yaml] [measures_per_section] [beats_per_measure]")
+        print("       python3 generate_show_measures.py <directory|'glob'> [output_dir] [measures_per_section] [beats_per_measure]")
         print("\nExamples:")
         print("  python3 generate_show_measures.py sarajevo.mp3")
         print("  python3 generate_show_measures.py sarajevo.mp3 show.yaml 8")
         print("  python3 generate_show_measures.py sarajevo.mp3 show.yaml 8 4  # 8 measures per section, 4/4 time")
+        print("  python3 generate_show_measures.py 'songs/*.mp3' shows/ 8 4")
         sys.exit(1)
     
     audio_file = sys.argv[1]
     
-    # Default output name
-    if len(sys.argv) >= 3:
-        output_file = sys.argv[2]
-    else:
-        base = os.path.splitext(os.path.basename(audio_file))[0]
-        output_file = f"{base}_show.yaml"
-    
     # Section length in measures (default 8)
     section_measures = 8
     if len(sys.argv) >= 4:
@@ -295,8 +237,34 @@ if __name__ == "__main__":
     if len(sys.argv) >= 5:
         beats_per_measure = int(sys.argv[4])
     
+    # Batch mode: a directory or glob pattern of audio files
+    if os.path.isdir(audio_file) or glob.has_magic(audio_file):
+        audio_files = find_audio_files(audio_file)
+        if not audio_files:
+            print(f"Error: No audio files found for: {audio_file}")
+            sys.exit(1)
+        output_dir = sys.argv[2] if len(sys.argv) >= 3 else "."
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"Generating {len(audio_files)} shows into {output_dir}...")
+        try:
+            generate_shows(audio_files, output_dir, section_measures, beats_per_measure)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        return
+    
+    # Default output name
+    if len(sys.argv) >= 3:
+        output_file = sys.argv[2]
+    else:
+        output_file = show_filename(audio_file)
+    
     if not os.path.exists(audio_file):
         print(f"Error: Audio file not found: {audio_file}")
         sys.exit(1)
     
-    generate_show(audio_file, output_file, section_measures, beats_per_measure)
\ No newline at end of file
+    generate_show(audio_file, output_file, section_measures, beats_per_measure)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -28,25 +28,45 @@ class GPIOController:
                 initial_value=False
             )
 
+        # Last state written to each channel, so set_state can skip no-ops
+        self._state = {name: False for name in self.channels}
+
     def on(self, name):
         """Turn a channel ON by name (e.g., 'T1')."""
         if name in self.channels:
             self.channels[name].on()
+            self._state[name] = True
 
     def off(self, name):
         """Turn a channel OFF by name."""
         if name in self.channels:
             self.channels[name].off()
+            self._state[name] = False
 
     def all_on(self):
         """Turn ALL channels on."""
-        for dev in self.channels.values():
+        for name, dev in self.channels.items():
             dev.on()
+            self._state[name] = True
 
     def all_off(self):
         """Turn ALL channels off."""
-        for dev in self.channels.values():
+        for name, dev in self.channels.items():
             dev.off()
+            self._state[name] = False
+
+    def set_state(self, states):
+        """
+        Apply a {name: bool} mapping in one go.
+        Only channels whose state actually changes are written to.
+        """
+        for name, value in states.items():
+            if name in self.channels and self._state[name] != value:
+                if value:
+                    self.channels[name].on()
+                else:
+                    self.channels[name].off()
+                self._state[name] = value
 
     def test_blink(self, duration=5, interval=0.5):
         """Blink each channel in sequence for testing."""
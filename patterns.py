@@ -1,18 +1,40 @@
 #!/usr/bin/env python3
+import math
 import time
-import random
+import numpy as np
 
 # These are the logical names from channel_map.yaml
 TREE_NAMES = ["T1", "T2", "T3", "BigTree"]
 BULB_NAMES = ["B1", "B2", "B3", "B4"]
 
-def _safe_on(gpio, name):
-    if name in gpio.channels:
-        gpio.on(name)
+def _tick(start, i, interval):
+    """
+    Sleep until step i is due (start + i * interval on time.monotonic())
+    and return the step to run next. If that time has already passed, the
+    missed steps are skipped instead of being run back to back.
+    """
+    now = time.monotonic()
+    if now > start + i * interval:
+        i = math.ceil((now - start) / interval)
+    remaining = start + i * interval - now
+    if remaining > 0:
+        time.sleep(remaining)
+    return i
 
-def _safe_off(gpio, name):
-    if name in gpio.channels:
-        gpio.off(name)
+def _check_interval(interval):
+    """
+    Patterns step on a fixed interval until duration is used up,
+    so a zero or negative interval would never finish.
+    """
+    if not interval > 0:
+        raise ValueError(f"Pattern interval must be positive, got {interval}")
+
+def _frame(gpio, on_names):
+    """
+    Full {name: bool} state for every channel with only on_names lit.
+    Patterns build their frames once up front and apply them with set_state.
+    """
+    return {name: name in on_names for name in gpio.channels}
 
 def all_off(gpio):
     gpio.all_off()
@@ -24,53 +46,47 @@ def blink_all(gpio, duration=5.0, interval=0.5):
     """
     Simple: all lights on, all lights off, repeat.
     """
-    end = time.time() + duration
-    state = False
-    while time.time() < end:
-        if state:
+    _check_interval(interval)
+    start = time.monotonic()
+    i = 0
+    while i * interval < duration:
+        if i % 2:
             gpio.all_off()
         else:
             gpio.all_on()
-        state = not state
-        time.sleep(interval)
+        i = _tick(start, i + 1, interval)
     gpio.all_off()
 
 def alternate_trees_and_bulbs(gpio, duration=5.0, interval=0.4):
     """
     Trees ON / Bulbs OFF, then Trees OFF / Bulbs ON.
     """
-    end = time.time() + duration
-    state = False
-    while time.time() < end:
-        if state:
-            # trees on, bulbs off
-            for t in TREE_NAMES:
-                _safe_on(gpio, t)
-            for b in BULB_NAMES:
-                _safe_off(gpio, b)
-        else:
-            # bulbs on, trees off
-            for t in TREE_NAMES:
-                _safe_off(gpio, t)
-            for b in BULB_NAMES:
-                _safe_on(gpio, b)
-        state = not state
-        time.sleep(interval)
+    _check_interval(interval)
+    start = time.monotonic()
+    trees = [n for n in TREE_NAMES if n in gpio.channels]
+    bulbs = [n for n in BULB_NAMES if n in gpio.channels]
+    trees_on = {**{t: True for t in trees}, **{b: False for b in bulbs}}
+    bulbs_on = {**{t: False for t in trees}, **{b: True for b in bulbs}}
+    i = 0
+    while i * interval < duration:
+        # Odd steps: trees on, bulbs off. Even steps: bulbs on, trees off.
+        gpio.set_state(trees_on if i % 2 else bulbs_on)
+        i = _tick(start, i + 1, interval)
     gpio.all_off()
 
 def wave_trees(gpio, duration=5.0, step_interval=0.2):
     """
     Light up trees one after another (T1 -> T2 -> T3 -> BigTree) in a wave.
     """
-    end = time.time() + duration
-    names = [n for n in TREE_NAMES if n in gpio.channels]
-    if not names:
+    _check_interval(step_interval)
+    start = time.monotonic()
+    frames = [_frame(gpio, (n,)) for n in TREE_NAMES if n in gpio.channels]
+    if not frames:
         return
-    while time.time() < end:
-        for name in names:
-            gpio.all_off()
-            _safe_on(gpio, name)
-            time.sleep(step_interval)
+    i = 0
+    while i * step_interval < duration:
+        gpio.set_state(frames[i % len(frames)])
+        i = _tick(start, i + 1, step_interval)
     gpio.all_off()
 
 def wave_all(gpio, duration=5.0, step_interval=0.2):
@@ -78,7 +94,8 @@ def wave_all(gpio, duration=5.0, step_interval=0.2):
     Light up trees and bulbs together in sequence:
     T1+B1, then T2+B2, then T3+B3, then BigTree+B4
     """
-    end = time.time() + duration
+    _check_interval(step_interval)
+    start = time.monotonic()
     # Pair trees with bulbs
     pairs = [
         ("T1", "B1"),
@@ -87,17 +104,15 @@ def wave_all(gpio, duration=5.0, step_interval=0.2):
         ("BigTree", "B4")
     ]
     # Filter to only include pairs where both channels exist
-    valid_pairs = [(t, b) for t, b in pairs 
-                   if t in gpio.channels and b in gpio.channels]
-    if not valid_pairs:
+    frames = [_frame(gpio, (t, b)) for t, b in pairs
+              if t in gpio.channels and b in gpio.channels]
+    if not frames:
         return
     
-    while time.time() < end:
-        for tree, bulb in valid_pairs:
-            gpio.all_off()
-            _safe_on(gpio, tree)
-            _safe_on(gpio, bulb)
-            time.sleep(step_interval)
+    i = 0
+    while i * step_interval < duration:
+        gpio.set_state(frames[i % len(frames)])
+        i = _tick(start, i + 1, step_interval)
     gpio.all_off()
 
 def trees_cascade(gpio, duration=5.0, step_interval=0.2):
@@ -105,21 +120,21 @@ def trees_cascade(gpio, duration=5.0, step_interval=0.2):
     Cascade effect for trees: turn on one at a time, then turn off one at a time.
     Sequence: T1 on, T2 on, T3 on, T4 on, T1 off, T2 off, T3 off, T4 off, repeat
     """
-    end = time.time() + duration
+    _check_interval(step_interval)
+    start = time.monotonic()
     names = [n for n in TREE_NAMES if n in gpio.channels]
     if not names:
         return
+    # Tree states for each step: trees turn on one at a time (keeping
+    # previous ones on), then turn off one at a time
+    n = len(names)
+    frames = ([{name: k <= j for k, name in enumerate(names)} for j in range(n)] +
+              [{name: k > j for k, name in enumerate(names)} for j in range(n)])
     
-    while time.time() < end:
-        # Turn on each tree, one at a time (keeping previous ones on)
-        for name in names:
-            _safe_on(gpio, name)
-            time.sleep(step_interval)
-        
-        # Turn off each tree, one at a time
-        for name in names:
-            _safe_off(gpio, name)
-            time.sleep(step_interval)
+    i = 0
+    while i * step_interval < duration:
+        gpio.set_state(frames[i % len(frames)])
+        i = _tick(start, i + 1, step_interval)
     
     gpio.all_off()
 
@@ -127,49 +142,55 @@ def chase_bulbs(gpio, duration=5.0, step_interval=0.15):
     """
     Chase pattern across the 4 bulb channels.
     """
-    end = time.time() + duration
-    names = [n for n in BULB_NAMES if n in gpio.channels]
-    if not names:
+    _check_interval(step_interval)
+    start = time.monotonic()
+    frames = [_frame(gpio, (n,)) for n in BULB_NAMES if n in gpio.channels]
+    if not frames:
         return
     idx = 0
-    while time.time() < end:
-        gpio.all_off()
-        _safe_on(gpio, names[idx % len(names)])
-        idx += 1
-        time.sleep(step_interval)
+    while idx * step_interval < duration:
+        gpio.set_state(frames[idx % len(frames)])
+        idx = _tick(start, idx + 1, step_interval)
     gpio.all_off()
 
 def sparkle(gpio, duration=5.0, interval=0.08, on_fraction=0.5):
     """
     Randomly turn some channels on/off to create a twinkling effect.
     """
-    end = time.time() + duration
+    _check_interval(interval)
+    start = time.monotonic()
     all_names = list(gpio.channels.keys())
     if not all_names:
         return
-    while time.time() < end:
-        for name in all_names:
-            if random.random() < on_fraction:
-                _safe_on(gpio, name)
-            else:
-                _safe_off(gpio, name)
-        time.sleep(interval)
+    rng = np.random.default_rng()
+    i = 0
+    while i * interval < duration:
+        # One draw per channel per frame, applied as a single batch
+        mask = rng.random(len(all_names)) < on_fraction
+        gpio.set_state(dict(zip(all_names, mask.tolist())))
+        i = _tick(start, i + 1, interval)
     gpio.all_off()
 
 def finale_flash(gpio, duration=3.0, interval=0.12):
     """
     Rapid strobe with everything, ending ON briefly, then OFF.
     """
-    end = time.time() + duration
-    state = False
-    while time.time() < end:
-        if state:
+    _check_interval(interval)
+    start = time.monotonic()
+    i = 0
+    while i * interval < duration:
+        if i % 2:
             gpio.all_on()
         else:
             gpio.all_off()
-        state = not state
-        time.sleep(interval)
+        i = _tick(start, i + 1, interval)
     # Hold everything on for a beat, then off
     gpio.all_on()
     time.sleep(0.5)
-    gpio.all_off()
\ No newline at end of file
+    gpio.all_off()
+
+# Every public pattern by name; show runners and test scripts dispatch through this
+PATTERN_TABLE = {
+    name: func for name, func in globals().items()
+    if callable(func) and not name.startswith("_") and getattr(func, "__module__", None) == __name__
+}
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+File helpers shared by generate_show.py and generate_show_measures.py:
+finding audio files to process, naming their shows and writing the
+generated show YAML.
+Requires: pyyaml
+"""
+
+import os
+import glob
+import yaml
+
+# libyaml-backed emitter when available. Shows are built from plain Python
+# types only, so the safe dumper is all we need.
+try:
+    from yaml import CSafeDumper as _Dumper
+except ImportError:
+    from yaml import SafeDumper as _Dumper
+
+# File types picked up when a directory is given on the command line
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg", ".flac")
+
+
+def find_audio_files(source):
+    """
+    Expand a command-line source into a list of audio files.
+    Accepts a directory (every audio file in it) or a glob pattern.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith(AUDIO_EXTENSIONS)
+        )
+    return sorted(glob.glob(source))
+
+
+def show_filename(audio_path):
+    """Default show file name for an audio file: <name>_show.yaml."""
+    base = os.path.splitext(os.path.basename(audio_path))[0]
+    return f"{base}_show.yaml"
+
+
+def check_unique_show_names(audio_files):
+    """
+    Raise ValueError if two audio files would get the same show file name
+    (e.g. song.mp3 and song.wav). Batch workers write their shows
+    concurrently, so one would silently overwrite the other.
+    """
+    seen = {}
+    for path in audio_files:
+        name = show_filename(path)
+        if name in seen:
+            raise ValueError(f"{seen[name]} and {path} would both write {name}")
+        seen[name] = path
+
+
+def write_show_yaml(f, show):
+    """
+    Write a show dict as YAML, emitting the sections one at a time instead of
+    building the whole document in memory first. Sections must come last.
+    Output is identical to yaml.dump(show, default_flow_style=False, sort_keys=False).
+    """
+    header = {k: v for k, v in show.items() if k != 'sections'}
+    yaml.dump(header, f, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
+
+    sections = show['sections']
+    if not sections:
+        f.write("sections: []\n")
+        return
+    f.write("sections:\n")
+    for section in sections:
+        yaml.dump([section], f, Dumper=_Dumper, default_flow_style=False, sort_keys=False)
@@ -1,47 +1,147 @@
 #!/usr/bin/env python3
 import os
+import json
 import time
+import inspect
 import yaml
 import pygame
-import threading
+from functools import lru_cache, partial
 from gpio_controller import GPIOController
 import patterns
 
+# Small mixer buffer so playback starts close to the time we record for it
+pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
+
+# Posted by the mixer when the song finishes playing
+END_EVENT = pygame.USEREVENT + 1
+
+# libyaml-backed parser when PyYAML was built with it, same semantics as safe_load
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Faster JSON for the parsed-show cache, if installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _reject(obj):
+    """orjson default hook: refuse anything JSON can't hold, like json.dumps does."""
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def _read_show_cache(cache_path, st):
+    """
+    Return the cached parse of the YAML file whose stat result is st, or
+    None if the cache is missing, was written for a different version of
+    the file, or is unreadable.
+    """
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        cached = orjson.loads(data) if orjson is not None else json.loads(data)
+        if cached["mtime_ns"] != st.st_mtime_ns or cached["size"] != st.st_size:
+            return None
+        return cached["show"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _write_show_cache(cache_path, st, show):
+    """
+    Save a parsed show as JSON next to its YAML file, tagged with the YAML's
+    mtime and size so a later read can tell whether it still matches.
+    Caching is best-effort: a read-only directory or values JSON can't hold
+    (e.g. YAML dates, non-string keys or NaN) just means the next load
+    parses the YAML again.
+    """
+    entry = {"mtime_ns": st.st_mtime_ns, "size": st.st_size, "show": show}
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        if orjson is not None:
+            # Route dates through _reject too instead of writing them as strings
+            data = orjson.dumps(entry, default=_reject,
+                                option=orjson.OPT_PASSTHROUGH_DATETIME)
+        else:
+            data = json.dumps(entry).encode()
+        # JSON turns non-string keys into strings and orjson writes NaN as
+        # null, so only cache a show that reads back exactly as parsed
+        loads = orjson.loads if orjson is not None else json.loads
+        if loads(data)["show"] != show:
+            return
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+# (abspath -> ((st_mtime_ns, st_size), (show, base_dir))) for repeat loads in one process
+_LOAD_CACHE = {}
+
 def load_show(file_path):
     """
     Load a YAML show file and also return the base directory
     so we can resolve the MP3 path relative to the YAML file.
+    The parsed show is cached in <file>.cache.json until the YAML changes,
+    and kept in memory so reloading an unchanged file costs one stat.
     """
-    base_dir = os.path.dirname(os.path.abspath(file_path)) or "."
-    with open(file_path, "r") as f:
-        show = yaml.safe_load(f)
+    key = os.path.abspath(file_path)
+    # Stat before reading so the cache is tagged with the version we parse
+    st = os.stat(key)
+    version = (st.st_mtime_ns, st.st_size)
+    hit = _LOAD_CACHE.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    
+    base_dir = os.path.dirname(key) or "."
+    cache_path = file_path + ".cache.json"
+    show = _read_show_cache(cache_path, st)
+    if show is None:
+        # Read the whole file first so libyaml parses one contiguous buffer
+        with open(file_path, "rb") as f:
+            data = f.read()
+        show = yaml.load(data, Loader=_YAML_LOADER)
+        _write_show_cache(cache_path, st, show)
+    _LOAD_CACHE[key] = (version, (show, base_dir))
     return show, base_dir
 
 def play_song(song_path):
     """
-    Initialize pygame mixer and start playing the given audio file.
-    Returns the start time so we can sync patterns.
+    Start playing the given audio file, initializing the mixer if needed.
+    Returns the start time (time.monotonic_ns()) so we can sync patterns.
     """
-    if not os.path.exists(song_path):
-        raise FileNotFoundError(f"Audio file not found: {song_path}")
     if not pygame.mixer.get_init():
-        pygame.mixer.init(frequency=44100)
-    pygame.mixer.music.load(song_path)
+        pygame.mixer.init()
+    try:
+        pygame.mixer.music.load(song_path)
+    except pygame.error:
+        # Only stat the path once loading has already failed
+        if not os.path.isfile(song_path):
+            raise FileNotFoundError(f"Audio file not found: {song_path}") from None
+        raise
     pygame.mixer.music.play()
-    return time.time()
+    return time.monotonic_ns()
 
-def timestamp_printer(start_time, stop_event):
+def wait_until(start_ns, deadline_ns, next_ts_ns):
     """
-    Background function that prints a timestamp every second
-    while the song is playing.
+    Sleep until deadline_ns (an offset from start_ns), printing the playback
+    time each time a whole second passes. next_ts_ns is the offset of the
+    next timestamp to print; the updated value is returned so the caller
+    can carry it into the next wait.
     """
-    next_t = 0.0
-    while not stop_event.is_set():
-        now = time.time() - start_time
-        if now >= next_t:
-            print(f"Time: {next_t:.1f}s")
-            next_t += 1.0
-        time.sleep(0.05)
+    _now = time.monotonic_ns
+    _sleep = time.sleep
+    while True:
+        now_ns = _now() - start_ns
+        if now_ns >= next_ts_ns:
+            # After a long pattern, report only the latest second passed
+            next_ts_ns += (now_ns - next_ts_ns) // 1_000_000_000 * 1_000_000_000
+            print(f"Time: {next_ts_ns / 1_000_000_000:.1f}s")
+            next_ts_ns += 1_000_000_000
+            continue
+        if now_ns >= deadline_ns:
+            return next_ts_ns
+        _sleep((min(next_ts_ns, deadline_ns) - now_ns) / 1_000_000_000)
 
 def beats_to_seconds(beats, bpm):
     """
@@ -50,89 +150,159 @@ def beats_to_seconds(beats, bpm):
     
     Example: 1 beat at 186 BPM = (1 / 186) * 60 = 0.3226 seconds
     """
+    return beats * seconds_per_beat(bpm)
+
+def seconds_per_beat(bpm):
+    """
+    Length of one beat in seconds. Shows compute this once and
+    multiply by it instead of dividing by BPM for every interval.
+    """
     if bpm <= 0:
         raise ValueError(f"Invalid BPM: {bpm}")
-    return (beats / bpm) * 60.0
+    return 60.0 / bpm
+
+@lru_cache(maxsize=None)
+def _interval_keys(keys):
+    """
+    Return the subset of an options key tuple that holds beat intervals
+    (keys ending in '_interval' or named 'interval'). Shows reuse the same
+    few option layouts, so this is cached per key tuple.
+    """
+    return frozenset(key for key in keys if key.endswith('_interval') or key == 'interval')
 
-def convert_beat_intervals(options, bpm):
+def convert_beat_intervals(options, sec_per_beat):
     """
     Convert any beat-based interval options to time-based seconds.
-    Looks for keys ending in '_interval' or named 'interval' and converts them.
-    Returns a new dict with converted values.
-    """
-    converted = {}
-    for key, value in options.items():
-        if key.endswith('_interval') or key == 'interval':
-            # Convert beats to seconds
-            converted[key] = beats_to_seconds(value, bpm)
-        else:
-            # Keep other options as-is
-            converted[key] = value
-    return converted
+    Looks for keys ending in '_interval' or named 'interval' and multiplies
+    them by sec_per_beat (see seconds_per_beat).
+    Returns a new dict with converted values, or options itself when it
+    has no interval keys.
+    """
+    interval_keys = _interval_keys(tuple(options))
+    if not interval_keys:
+        return options
+    return {
+        key: value * sec_per_beat if key in interval_keys else value
+        for key, value in options.items()
+    }
+
+def _compile_plan(show, sec_per_beat, gpio):
+    """
+    Resolve every section of the show up front so the timed loop only has
+    to sleep and call. Returns a list of (start_ns, end_ns, thunk, label)
+    tuples, where start_ns and end_ns are offsets from the song start and
+    thunk is the pattern with gpio, duration and its options bound. Beat
+    intervals are converted with sec_per_beat, or left as seconds if None.
+    Raises ValueError for unknown patterns, options the pattern doesn't
+    accept, or intervals that aren't positive, so a bad show file fails
+    before the music starts.
+    """
+    plan = []
+    for section in show["sections"]:
+        pattern_name = section["pattern"]
+        start = float(section["start"])
+        end = float(section["end"])
+        duration = end - start
+        if duration <= 0:
+            continue
+        
+        pattern_func = patterns.PATTERN_TABLE.get(pattern_name)
+        if pattern_func is None:
+            raise ValueError(f"Pattern '{pattern_name}' not found (section at {start:.2f}s)")
+        
+        kwargs = section.get("options") or {}
+        
+        # Convert beat-based intervals to seconds if BPM is specified
+        if sec_per_beat is not None:
+            kwargs = convert_beat_intervals(kwargs, sec_per_beat)
+        
+        try:
+            inspect.signature(pattern_func).bind(gpio, duration=duration, **kwargs)
+        except TypeError as e:
+            raise ValueError(f"Bad options for pattern '{pattern_name}' (section at {start:.2f}s): {e}") from None
+        
+        # A zero or negative interval would keep the pattern looping forever
+        for key in _interval_keys(tuple(kwargs)):
+            if not kwargs[key] > 0:
+                raise ValueError(f"Option '{key}' for pattern '{pattern_name}' must be positive "
+                                 f"(section at {start:.2f}s), got {kwargs[key]}")
+        
+        plan.append((
+            int(start * 1_000_000_000),
+            int(end * 1_000_000_000),
+            partial(pattern_func, gpio, duration=duration, **kwargs),
+            f"[{start:5.2f}–{end:5.2f}] Running pattern: {pattern_name}",
+        ))
+    return plan
 
 def run_show(show, base_dir="."):
     """
     Run a light show based on a loaded show config.
-    Also starts a background timestamp printer so you can
-    see the current playback time every second.
+    While waiting between sections it prints the current
+    playback time every second.
     """
     gpio = GPIOController()
-    sections = show["sections"]
     audio_file = show["file"]
     bpm = show.get("bpm")
     
     if bpm is None:
+        sec_per_beat = None
         print("WARNING: No BPM specified in config file. Intervals will be used as-is (in seconds).")
     else:
-        print(f"BPM: {bpm} (1 beat = {beats_to_seconds(1, bpm):.6f} seconds)")
+        sec_per_beat = seconds_per_beat(bpm)
+        print(f"BPM: {bpm} (1 beat = {sec_per_beat:.6f} seconds)")
+    
+    plan = _compile_plan(show, sec_per_beat, gpio)
+    
+    # Open the audio device before the song so play() starts right away
+    pygame.mixer.init()
+    # The runner is headless; pygame's event queue still needs a video driver
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.mixer.music.set_endevent(END_EVENT)
     
     # Resolve MP3 location
     audio_path = os.path.join(base_dir, audio_file)
     print(f"Playing audio: {audio_path}")
-    start_time = play_song(audio_path)
-    
-    # Start background timestamp thread
-    stop_event = threading.Event()
-    ts_thread = threading.Thread(
-        target=timestamp_printer,
-        args=(start_time, stop_event),
-        daemon=True,
-    )
-    ts_thread.start()
+    start_ns = play_song(audio_path)
+    next_ts_ns = 0
     
     try:
-        for section in sections:
-            pattern_name = section["pattern"]
-            start = float(section["start"])
-            end = float(section["end"])
-            duration = end - start
-            if duration <= 0:
-                continue
-            
-            # Wait until it is time for this section
-            while time.time() - start_time < start:
-                time.sleep(0.01)
-            
-            print(f"[{start:5.2f}–{end:5.2f}] Running pattern: {pattern_name}")
-            
-            args = section.get("options", {})
+        for section_start_ns, section_end_ns, thunk, label in plan:
+            elapsed_ns = time.monotonic_ns() - start_ns
             
-            # Convert beat-based intervals to seconds if BPM is specified
-            if bpm is not None:
-                args = convert_beat_intervals(args, bpm)
+            # Already over (a previous pattern overran): skip it
+            if elapsed_ns >= section_end_ns:
+                continue
             
-            if not hasattr(patterns, pattern_name):
-                print(f"WARNING: Pattern '{pattern_name}' not found. Skipping.")
+            if elapsed_ns >= section_start_ns:
+                # Running late: start now and only fill what's left of the section
+                print(label)
+                thunk(duration=(section_end_ns - elapsed_ns) / 1_000_000_000)
                 continue
             
-            pattern_func = getattr(patterns, pattern_name)
+            # Wait until it is time for this section
+            next_ts_ns = wait_until(start_ns, section_start_ns, next_ts_ns)
+            
+            print(label)
             
             # Run the pattern (blocking) for this section's duration
-            pattern_func(gpio, duration=duration, **args)
+            thunk()
         
-        # After all sections: wait for music to stop
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
+        # After all sections: block on the mixer's end event, waking only
+        # to print timestamps (and to double-check the song is still playing)
+        _now = time.monotonic_ns
+        _wait = pygame.event.wait
+        _get_busy = pygame.mixer.music.get_busy
+        while True:
+            now_ns = _now() - start_ns
+            event = _wait(max(1, (next_ts_ns - now_ns) // 1_000_000))
+            if event.type == END_EVENT:
+                break
+            if event.type == pygame.NOEVENT:
+                if not _get_busy():
+                    break
+                next_ts_ns = wait_until(start_ns, next_ts_ns, next_ts_ns)
     
     finally:
         print("Show done. Turning everything off.")
@@ -141,9 +311,6 @@ def run_show(show, base_dir="."):
             pygame.mixer.music.stop()
         except Exception:
             pass
-        # Stop timestamp thread
-        stop_event.set()
-        ts_thread.join(timeout=1.0)
 
 if __name__ == "__main__":
     import sys
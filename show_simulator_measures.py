@@ -6,99 +6,136 @@ Uses the same YAML files as show_runner_measures.py but displays lights on scree
 
 import os
 import sys
-import time
+import queue
+import threading
 import yaml
 import pygame
+from collections import namedtuple
+from operator import attrgetter
 from pygame import gfxdraw
-import threading
+
+# Patterns live next to this script; run_simulation reports if they're missing
+try:
+    import patterns
+except ImportError:
+    patterns = None
+
+# libyaml-backed parser when PyYAML was built with it, same semantics as safe_load
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Channel names, interned once; every per-channel dict below is keyed by these
+CHANNEL_NAMES = tuple(sys.intern(n) for n in ("T1", "T2", "T3", "BigTree", "B1", "B2", "B3", "B4"))
+TREE_NAMES = CHANNEL_NAMES[:4]
+BULB_NAMES = CHANNEL_NAMES[4:]
 
 # Color definitions
 BG_COLOR = (20, 20, 30)
 TREE_COLOR_ON = (255, 215, 0)  # Gold for tree lights
 TREE_COLOR_OFF = (40, 35, 15)
-BULB_COLOR_ON = {
-    "B1": (255, 50, 50),    # Red
-    "B2": (50, 255, 50),    # Green
-    "B3": (50, 50, 255),    # Blue
-    "B4": (255, 150, 50)    # Orange
-}
+BULB_COLOR_ON = dict(zip(BULB_NAMES, (
+    (255, 50, 50),    # Red
+    (50, 255, 50),    # Green
+    (50, 50, 255),    # Blue
+    (255, 150, 50)    # Orange
+)))
 BULB_COLOR_OFF = (30, 30, 30)
 TEXT_COLOR = (200, 200, 200)
 LABEL_COLOR = (150, 150, 150)
 
 
+# One show section, with start/end already in seconds (measure bounds are None
+# for time-based sections)
+Section = namedtuple("Section", "start end pattern options start_measure end_measure")
+
 class SimulatorGPIO:
     """Mock GPIO controller that tracks state instead of controlling hardware."""
     
+    # One bit per channel; the whole state is a single int
+    NAMES = CHANNEL_NAMES
+    _MASKS = {name: 1 << i for i, name in enumerate(NAMES)}
+    _ALL = (1 << len(NAMES)) - 1
+    
     def __init__(self):
         # Initialize all channels to OFF
-        self.channels = {
-            "T1": False,
-            "T2": False,
-            "T3": False,
-            "BigTree": False,
-            "B1": False,
-            "B2": False,
-            "B3": False,
-            "B4": False
-        }
+        self.state = 0
+    
+    @property
+    def channels(self):
+        """Snapshot of all channels as {name: bool}."""
+        state = self.state
+        return {name: bool(state & mask) for name, mask in self._MASKS.items()}
+    
+    def is_on(self, name):
+        """Return True if a channel is ON."""
+        return bool(self.state & self._MASKS.get(name, 0))
     
     def on(self, name):
         """Turn a channel ON."""
-        if name in self.channels:
-            self.channels[name] = True
+        self.state |= self._MASKS.get(name, 0)
     
     def off(self, name):
         """Turn a channel OFF."""
-        if name in self.channels:
-            self.channels[name] = False
+        self.state &= ~self._MASKS.get(name, 0)
     
     def all_on(self):
         """Turn ALL channels on."""
-        for name in self.channels:
-            self.channels[name] = True
+        self.state = self._ALL
     
     def all_off(self):
         """Turn ALL channels off."""
-        for name in self.channels:
-            self.channels[name] = False
+        self.state = 0
+    
+    def set_state(self, states):
+        """Apply a {name: bool} mapping in one go."""
+        state = self.state
+        for name, value in states.items():
+            mask = self._MASKS.get(name, 0)
+            state = state | mask if value else state & ~mask
+        self.state = state
+
+
+# Window-content-lost events; the next update() repaints the whole window
+_EXPOSE_EVENTS = (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE)
+_HANDLED_EVENTS = (pygame.QUIT, pygame.KEYDOWN) + _EXPOSE_EVENTS
 
 
 class LightVisualizer:
     """Pygame window that displays the current state of all lights."""
     
-    def __init__(self, width=1000, height=700):
+    def __init__(self, width=1000, height=700, target_fps=120):
         pygame.init()
         self.width = width
         self.height = height
-        self.screen = pygame.display.set_mode((width, height))
+        # No vsync: frames are paced by tick() against the audio clock instead
+        self.screen = pygame.display.set_mode((width, height), 0, vsync=0)
+        # Only quit/key/expose events are handled; keep SDL from queueing the rest
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(_HANDLED_EVENTS)
+        self.target_fps = target_fps
+        self.clock = pygame.time.Clock()
+        self._last_tick = pygame.time.get_ticks()
         pygame.display.set_caption("Christmas Light Show Simulator (Measures)")
         
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
         
         # Layout positions for lights
-        self.tree_positions = {
-            "T1": (200, 300),
-            "T2": (350, 300),
-            "T3": (500, 300),
-            "BigTree": (700, 300)
-        }
+        self.tree_positions = dict(zip(TREE_NAMES, (
+            (200, 300),
+            (350, 300),
+            (500, 300),
+            (700, 300)
+        )))
         
-        self.bulb_positions = {
-            "B1": (200, 500),
-            "B2": (350, 500),
-            "B3": (500, 500),
-            "B4": (650, 500)
-        }
+        self.bulb_positions = dict(zip(BULB_NAMES, (
+            (200, 500),
+            (350, 500),
+            (500, 500),
+            (650, 500)
+        )))
         
         # Size definitions
-        self.tree_sizes = {
-            "T1": 60,
-            "T2": 60,
-            "T3": 60,
-            "BigTree": 100
-        }
+        self.tree_sizes = dict(zip(TREE_NAMES, (60, 60, 60, 100)))
         
         self.bulb_size = 70
         
@@ -108,85 +145,188 @@ class LightVisualizer:
         self.current_measure = 0
         self.total_measures = 0
         self.bpm = 120
-    
-    def draw_tree(self, pos, size, is_on, label):
-        """Draw a Christmas tree shape."""
-        x, y = pos
-        color = TREE_COLOR_ON if is_on else TREE_COLOR_OFF
         
-        # Draw triangle tree
-        points = [
-            (x, y - size),           # Top
-            (x - size//2, y + size//3),  # Bottom left
-            (x + size//2, y + size//3)   # Bottom right
-        ]
-        pygame.draw.polygon(self.screen, color, points)
+        # Rendered text surfaces keyed by (font, text, color)
+        self._label_cache = {}
+        for name in (*self.tree_positions, *self.bulb_positions):
+            self._text(self.small_font, name, LABEL_COLOR)
+        for text in ("Light Show Simulator (Measures)", "Trees", "Bulbs"):
+            self._text(self.font, text, TEXT_COLOR)
         
-        # Draw trunk
-        trunk_width = size // 5
-        trunk_height = size // 4
-        trunk_rect = pygame.Rect(x - trunk_width//2, y + size//3, trunk_width, trunk_height)
-        trunk_color = (101, 67, 33) if is_on else (40, 30, 20)
-        pygame.draw.rect(self.screen, trunk_color, trunk_rect)
+        # Pre-rendered (off, on) sprites for every light
+        self._sprite_pos = {}
+        self._tree_sprites = {}
+        for name, pos in self.tree_positions.items():
+            self._sprite_pos[name], self._tree_sprites[name] = self._bake_tree(pos, self.tree_sizes[name], name)
+        self._bulb_sprites = {}
+        for name, pos in self.bulb_positions.items():
+            self._sprite_pos[name], self._bulb_sprites[name] = self._bake_bulb(pos, name, BULB_COLOR_ON[name])
         
-        # Add glow effect when on
-        if is_on:
-            glow_radius = size + 15
-            glow_surface = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, (*TREE_COLOR_ON, 30), (glow_radius, glow_radius), glow_radius)
-            self.screen.blit(glow_surface, (x - glow_radius, y - glow_radius))
+        # Screen area each light covers, and the strip above them for the info panel
+        self._sprite_rects = {
+            name: sprites[0].get_rect(topleft=self._sprite_pos[name])
+            for name, sprites in (*self._tree_sprites.items(), *self._bulb_sprites.items())
+        }
+        self._panel_rect = pygame.Rect(0, 0, width, 170)
         
-        # Label
-        label_surface = self.small_font.render(label, True, LABEL_COLOR)
-        label_rect = label_surface.get_rect(center=(x, y + size//2 + 40))
-        self.screen.blit(label_surface, label_rect)
-    
-    def draw_bulb(self, pos, is_on, label, color_on):
-        """Draw a large decorative bulb."""
-        x, y = pos
-        color = color_on if is_on else BULB_COLOR_OFF
+        # Everything draw_lights() puts on screen: the fixed section labels,
+        # then (off/on sprites, position, channel bit) for each light
+        self._section_labels = [
+            (self._text(self.font, "Trees", TEXT_COLOR), (370, 220)),
+            (self._text(self.font, "Bulbs", TEXT_COLOR), (380, 420)),
+        ]
+        self._lights = [
+            (sprites, self._sprite_pos[name], SimulatorGPIO._MASKS[name])
+            for name, sprites in (*self._tree_sprites.items(), *self._bulb_sprites.items())
+        ]
+        
+        # Empty progress bar: gray background with its 2px border
+        self._bar_bg = pygame.Surface((400, 20))
+        self._bar_bg.fill((60, 60, 70))
+        pygame.draw.rect(self._bar_bg, TEXT_COLOR, self._bar_bg.get_rect(), 2)
         
-        # Draw bulb circle
-        pygame.draw.circle(self.screen, color, (x, y), self.bulb_size // 2)
+        # Static parts of the info panel, pre-composed: the background and
+        # title, plus a second copy with the empty progress bar on it
+        self._chrome = pygame.Surface(self._panel_rect.size)
+        self._chrome.fill(BG_COLOR)
+        self._chrome.blit(self._text(self.font, "Light Show Simulator (Measures)", TEXT_COLOR), (20, 20))
+        self._chrome_bar = self._chrome.copy()
+        self._chrome_bar.blit(self._bar_bg, (20, 130))
         
-        # Add glow effect when on
-        if is_on:
-            glow_radius = self.bulb_size
-            glow_surface = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, (*color_on, 50), (glow_radius, glow_radius), glow_radius)
-            self.screen.blit(glow_surface, (x - glow_radius, y - glow_radius))
+        # Time line surface, re-rendered only when its 0.1s bucket changes
+        self._time_key = None
+        self._time_surf = None
         
-        # Draw base/socket
-        base_rect = pygame.Rect(x - 8, y - self.bulb_size//2 - 15, 16, 15)
-        base_color = (80, 80, 80) if is_on else (40, 40, 40)
-        pygame.draw.rect(self.screen, base_color, base_rect)
+        # What was on screen last frame, so update() can redraw only what changed
+        self._prev_state = 0
+        self._prev_info = None
+    
+    def tick(self):
+        """
+        Wait out the rest of the frame at target_fps (0 means uncapped).
+        Sleeps for most of it and only busy-waits the last millisecond,
+        so frames land on time without pinning a CPU core.
+        """
+        if self.target_fps:
+            frame_ms = 1000 // self.target_fps
+            remaining = frame_ms - (pygame.time.get_ticks() - self._last_tick)
+            if remaining > 1:
+                pygame.time.wait(remaining - 1)
+        self.clock.tick_busy_loop(self.target_fps)
+        self._last_tick = pygame.time.get_ticks()
+    
+    def _text(self, font, text, color):
+        """Render text once and reuse the surface on later frames."""
+        key = (id(font), text, color)
+        surface = self._label_cache.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._label_cache[key] = surface
+        return surface
+    
+    def _bake_tree(self, pos, size, label):
+        """
+        Pre-render a tree in both states. Returns the screen position of the
+        sprites and an (off, on) pair of surfaces holding trunk, glow and label.
+        """
+        x, y = pos
+        glow_radius = size + 15
+        label_surface = self._text(self.small_font, label, LABEL_COLOR)
+        label_rect = label_surface.get_rect(center=(x, y + size//2 + 40))
+        bounds = pygame.Rect(x - glow_radius, y - glow_radius, glow_radius * 2, glow_radius * 2).union(label_rect)
         
-        # Label
-        label_surface = self.small_font.render(label, True, LABEL_COLOR)
+        # Draw in sprite-local coordinates
+        x -= bounds.x
+        y -= bounds.y
+        sprites = []
+        for is_on in (False, True):
+            sprite = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            color = TREE_COLOR_ON if is_on else TREE_COLOR_OFF
+            
+            # Glow goes underneath so the tree itself stays fully opaque
+            if is_on:
+                pygame.draw.circle(sprite, (*TREE_COLOR_ON, 30), (x, y), glow_radius)
+            
+            # Draw triangle tree
+            points = [
+                (x, y - size),           # Top
+                (x - size//2, y + size//3),  # Bottom left
+                (x + size//2, y + size//3)   # Bottom right
+            ]
+            pygame.draw.polygon(sprite, color, points)
+            
+            # Draw trunk
+            trunk_width = size // 5
+            trunk_height = size // 4
+            trunk_rect = pygame.Rect(x - trunk_width//2, y + size//3, trunk_width, trunk_height)
+            trunk_color = (101, 67, 33) if is_on else (40, 30, 20)
+            pygame.draw.rect(sprite, trunk_color, trunk_rect)
+            
+            # Label
+            sprite.blit(label_surface, label_rect.move(-bounds.x, -bounds.y))
+            sprites.append(sprite)
+        return bounds.topleft, tuple(sprites)
+    
+    def _bake_bulb(self, pos, label, color_on):
+        """
+        Pre-render a bulb in both states. Returns the screen position of the
+        sprites and an (off, on) pair of surfaces holding socket, glow and label.
+        """
+        x, y = pos
+        glow_radius = self.bulb_size
+        label_surface = self._text(self.small_font, label, LABEL_COLOR)
         label_rect = label_surface.get_rect(center=(x, y + self.bulb_size//2 + 25))
-        self.screen.blit(label_surface, label_rect)
+        bounds = pygame.Rect(x - glow_radius, y - glow_radius, glow_radius * 2, glow_radius * 2).union(label_rect)
+        
+        # Draw in sprite-local coordinates
+        x -= bounds.x
+        y -= bounds.y
+        sprites = []
+        for is_on in (False, True):
+            sprite = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            color = color_on if is_on else BULB_COLOR_OFF
+            
+            # Glow goes underneath so the bulb itself stays fully opaque
+            if is_on:
+                pygame.draw.circle(sprite, (*color_on, 50), (x, y), glow_radius)
+            
+            # Draw bulb circle
+            pygame.draw.circle(sprite, color, (x, y), self.bulb_size // 2)
+            
+            # Draw base/socket
+            base_rect = pygame.Rect(x - 8, y - self.bulb_size//2 - 15, 16, 15)
+            base_color = (80, 80, 80) if is_on else (40, 40, 40)
+            pygame.draw.rect(sprite, base_color, base_rect)
+            
+            # Label
+            sprite.blit(label_surface, label_rect.move(-bounds.x, -bounds.y))
+            sprites.append(sprite)
+        return bounds.topleft, tuple(sprites)
     
     def draw_info_panel(self):
         """Draw information panel at the top."""
-        # Title
-        title = self.font.render("Light Show Simulator (Measures)", True, TEXT_COLOR)
-        self.screen.blit(title, (20, 20))
+        # Background and title (plus the bar frame when there is a song length)
+        chrome = self._chrome_bar if self.song_duration > 0 else self._chrome
+        self.screen.blit(chrome, self._panel_rect)
         
         # Current pattern
         pattern_text = f"Pattern: {self.current_pattern}"
-        pattern_surface = self.small_font.render(pattern_text, True, TEXT_COLOR)
+        pattern_surface = self._text(self.small_font, pattern_text, TEXT_COLOR)
         self.screen.blit(pattern_surface, (20, 70))
         
         # Tempo info
         tempo_text = f"Tempo: {self.bpm:.1f} BPM"
-        tempo_surface = self.small_font.render(tempo_text, True, TEXT_COLOR)
+        tempo_surface = self._text(self.small_font, tempo_text, TEXT_COLOR)
         self.screen.blit(tempo_surface, (400, 70))
         
         # Time and measure display
         if self.song_duration > 0:
-            time_text = f"Time: {self.current_time:.1f}s / {self.song_duration:.1f}s"
-            time_surface = self.small_font.render(time_text, True, TEXT_COLOR)
-            self.screen.blit(time_surface, (20, 100))
+            time_key = (int(self.current_time * 10), self.song_duration)
+            if time_key != self._time_key:
+                time_text = f"Time: {time_key[0] / 10:.1f}s / {self.song_duration:.1f}s"
+                self._time_surf = self.small_font.render(time_text, True, TEXT_COLOR)
+                self._time_key = time_key
+            self.screen.blit(self._time_surf, (20, 100))
             
             measure_text = f"Measure: {self.current_measure} / {self.total_measures}"
             measure_surface = self.small_font.render(measure_text, True, TEXT_COLOR)
@@ -198,30 +338,45 @@ class LightVisualizer:
             bar_x = 20
             bar_y = 130
             
-            # Background
-            pygame.draw.rect(self.screen, (60, 60, 70), (bar_x, bar_y, bar_width, bar_height))
-            
-            # Progress
-            progress = min(1.0, self.current_time / self.song_duration)
-            progress_width = int(bar_width * progress)
-            pygame.draw.rect(self.screen, (100, 200, 100), (bar_x, bar_y, progress_width, bar_height))
-            
-            # Border
-            pygame.draw.rect(self.screen, TEXT_COLOR, (bar_x, bar_y, bar_width, bar_height), 2)
+            # Progress, inset so it never covers the 2px border baked into the chrome
+            elapsed_ms = int(self.current_time * 1000)
+            duration_ms = max(1, int(self.song_duration * 1000))
+            progress_width = bar_width * min(elapsed_ms, duration_ms) // duration_ms
+            fill_width = max(0, min(progress_width, bar_width - 2) - 2)
+            pygame.draw.rect(self.screen, (100, 200, 100), (bar_x + 2, bar_y + 2, fill_width, bar_height - 4))
+    
+    def draw_lights(self, state):
+        """
+        Draw the section labels and every light in one batched blit.
+        Callers set a clip rect on the screen to repaint just one area.
+        """
+        self.screen.blits(
+            self._section_labels
+            + [(sprites[1 if state & mask else 0], pos) for sprites, pos, mask in self._lights],
+            doreturn=False,
+        )
     
     def update(self, gpio, pattern_name="", elapsed_time=0.0, total_duration=0.0, 
                current_measure=0, total_measures=0, bpm=120):
         """Update the display with current GPIO state."""
         # Handle pygame events
-        for event in pygame.event.get():
+        for event in pygame.event.get(_HANDLED_EVENTS):
             if event.type == pygame.QUIT:
                 return False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_q:
                     return False
+            elif event.type in _EXPOSE_EVENTS:
+                # The window contents were lost (e.g. restored from minimized)
+                self._prev_info = None
         
-        # Clear screen
-        self.screen.fill(BG_COLOR)
+        # Skip the frame if no light changed and the panel text would read the same
+        # (the time display and progress bar only move every 0.1s)
+        state = gpio.state
+        info = (pattern_name, int(elapsed_time * 10), total_duration, current_measure, total_measures, bpm)
+        changed = state ^ self._prev_state
+        if not changed and info == self._prev_info:
+            return True
         
         # Update info
         self.current_pattern = pattern_name
@@ -231,30 +386,32 @@ class LightVisualizer:
         self.total_measures = total_measures
         self.bpm = bpm
         
-        # Draw info panel
-        self.draw_info_panel()
-        
-        # Draw section labels
-        section_label = self.font.render("Trees", True, TEXT_COLOR)
-        self.screen.blit(section_label, (370, 220))
-        
-        bulb_label = self.font.render("Bulbs", True, TEXT_COLOR)
-        self.screen.blit(bulb_label, (380, 420))
-        
-        # Draw all trees
-        for name, pos in self.tree_positions.items():
-            size = self.tree_sizes[name]
-            is_on = gpio.channels.get(name, False)
-            self.draw_tree(pos, size, is_on, name)
+        if self._prev_info is None:
+            # First frame: draw everything
+            self.screen.fill(BG_COLOR)
+            self.draw_info_panel()
+            self.draw_lights(state)
+            pygame.display.flip()
+        else:
+            rects = []
+            if info != self._prev_info:
+                self.screen.set_clip(self._panel_rect)
+                self.draw_info_panel()
+                rects.append(self._panel_rect)
+            # Walk the changed bits lowest first
+            while changed:
+                bit = changed & -changed
+                changed ^= bit
+                rect = self._sprite_rects[SimulatorGPIO.NAMES[bit.bit_length() - 1]]
+                self.screen.set_clip(rect)
+                self.screen.fill(BG_COLOR)
+                self.draw_lights(state)
+                rects.append(rect)
+            self.screen.set_clip(None)
+            pygame.display.update(rects)
         
-        # Draw all bulbs
-        for name, pos in self.bulb_positions.items():
-            is_on = gpio.channels.get(name, False)
-            color = BULB_COLOR_ON[name]
-            self.draw_bulb(pos, is_on, name, color)
-        
-        # Update display
-        pygame.display.flip()
+        self._prev_state = state
+        self._prev_info = info
         return True
 
 
@@ -262,12 +419,15 @@ def load_show(file_path):
     """Load a YAML show file."""
     base_dir = os.path.dirname(os.path.abspath(file_path)) or "."
     with open(file_path, "r") as f:
-        show = yaml.safe_load(f)
+        show = yaml.load(f, Loader=_YAML_LOADER)
     return show, base_dir
 
 
 def play_song(song_path):
-    """Initialize pygame mixer and start playing the audio file."""
+    """
+    Initialize pygame mixer and start playing the audio file.
+    Returns the start time in pygame ticks (ms), or None without audio.
+    """
     if not os.path.exists(song_path):
         print(f"Warning: Audio file not found: {song_path}")
         print("Running without audio...")
@@ -278,7 +438,7 @@ def play_song(song_path):
     
     pygame.mixer.music.load(song_path)
     pygame.mixer.music.play()
-    return time.time()
+    return pygame.time.get_ticks()
 
 
 def measures_to_seconds(measures, bpm, beats_per_measure=4):
@@ -296,41 +456,71 @@ def seconds_to_measures(seconds, bpm, beats_per_measure=4):
 
 
 def convert_sections_to_seconds(sections, bpm, beats_per_measure=4):
-    """Convert sections from measures to seconds if needed."""
+    """
+    Convert parsed YAML sections to Section tuples, turning measures into
+    seconds if needed.
+    """
     converted = []
     
     for section in sections:
-        new_section = section.copy()
-        
         # Check if using measure-based format
         if 'start_measure' in section and 'end_measure' in section:
-            # Convert measures to seconds
-            new_section['start'] = measures_to_seconds(section['start_measure'], bpm, beats_per_measure)
-            new_section['end'] = measures_to_seconds(section['end_measure'], bpm, beats_per_measure)
-            # Keep original measure info for display
-            new_section['_start_measure'] = section['start_measure']
-            new_section['_end_measure'] = section['end_measure']
+            # Convert measures to seconds, keeping the original measure info for display
+            start_measure = section['start_measure']
+            end_measure = section['end_measure']
+            start = measures_to_seconds(start_measure, bpm, beats_per_measure)
+            end = measures_to_seconds(end_measure, bpm, beats_per_measure)
         elif 'start' not in section or 'end' not in section:
             print(f"WARNING: Section missing timing info: {section}")
             continue
+        else:
+            start_measure = end_measure = None
+            start = float(section['start'])
+            end = float(section['end'])
         
-        converted.append(new_section)
+        converted.append(Section(start, end, section['pattern'], section.get('options') or {},
+                                 start_measure, end_measure))
     
     return converted
 
 
-def run_simulation(show, base_dir="."):
+def compile_schedule(sections, pattern_table):
+    """
+    Resolve the show's sections once before playback.
+    Returns a list of (start, end, pattern_name, pattern_func, args, label)
+    tuples; empty sections and unknown patterns are dropped with a warning.
+    """
+    schedule = []
+    for section in sections:
+        pattern_name = section.pattern
+        start = section.start
+        end = section.end
+        if end - start <= 0:
+            continue
+        
+        pattern_func = pattern_table.get(pattern_name)
+        if pattern_func is None:
+            print(f"WARNING: Pattern '{pattern_name}' not found. Skipping.")
+            continue
+        
+        if section.start_measure is not None:
+            label = (f"[M{section.start_measure:3d}–{section.end_measure:3d}] "
+                     f"({start:5.1f}–{end:5.1f}s) Running pattern: {pattern_name}")
+        else:
+            label = f"[{start:5.2f}–{end:5.2f}] Running pattern: {pattern_name}"
+        schedule.append((start, end, pattern_name, pattern_func, section.options, label))
+    return schedule
+
+
+def run_simulation(show, base_dir=".", target_fps=120):
     """Run the light show simulation."""
-    # Import patterns module
-    try:
-        import patterns
-    except ImportError:
+    if patterns is None:
         print("Error: patterns.py not found in the current directory")
         sys.exit(1)
     
     # Create simulator GPIO and visualizer
     gpio = SimulatorGPIO()
-    visualizer = LightVisualizer()
+    visualizer = LightVisualizer(target_fps=target_fps)
     
     # Get BPM and beats per measure
     bpm = show.get('bpm', 120)
@@ -346,95 +536,85 @@ def run_simulation(show, base_dir="."):
     audio_path = os.path.join(base_dir, audio_file)
     
     # Calculate total duration and measures
-    total_duration = max(s["end"] for s in sections) if sections else 0
+    total_duration = max(map(attrgetter("end"), sections)) if sections else 0
     total_measures = int(seconds_to_measures(total_duration, bpm, beats_per_measure))
     
     print(f"Total duration: {total_duration:.1f}s")
     print(f"Total measures: {total_measures}")
     print(f"Sections: {len(sections)}")
+    schedule = compile_schedule(sections, patterns.PATTERN_TABLE)
     print("\nPress ESC or Q to quit\n")
     
     # Start audio
-    start_time = play_song(audio_path)
-    if start_time is None:
-        start_time = time.time()
+    # Show clock in SDL milliseconds (no syscall per read, unlike time.time())
+    start_ticks = play_song(audio_path)
+    if start_ticks is None:
+        start_ticks = pygame.time.get_ticks()
+    
+    # One long-lived thread runs every pattern while the main thread draws.
+    # The pattern controls gpio state, the visualizer displays it.
+    work_q = queue.Queue()
+    pattern_done = threading.Event()
+    
+    def pattern_worker():
+        while True:
+            pattern_func, duration, args = work_q.get()
+            try:
+                pattern_func(gpio, duration=duration, **args)
+            except Exception as e:
+                print(f"WARNING: Pattern failed: {e}")
+            pattern_done.set()
+    
+    threading.Thread(target=pattern_worker, daemon=True).start()
     
-    clock = pygame.time.Clock()
     running = True
     
     try:
-        for section in sections:
+        for start, end, pattern_name, pattern_func, args, label in schedule:
             if not running:
                 break
             
-            pattern_name = section["pattern"]
-            start = float(section["start"])
-            end = float(section["end"])
             duration = end - start
             
-            if duration <= 0:
-                continue
-            
             # Wait until it's time for this section
-            while time.time() - start_time < start:
-                elapsed = time.time() - start_time
+            while pygame.time.get_ticks() - start_ticks < start * 1000:
+                elapsed = (pygame.time.get_ticks() - start_ticks) / 1000.0
                 current_measure = int(seconds_to_measures(elapsed, bpm, beats_per_measure))
                 if not visualizer.update(gpio, "Waiting...", elapsed, total_duration,
                                         current_measure, total_measures, bpm):
                     running = False
                     break
-                clock.tick(60)  # 60 FPS
+                visualizer.tick()
             
             if not running:
                 break
             
             # Display timing info
-            if '_start_measure' in section:
-                print(f"[M{section['_start_measure']:3d}–{section['_end_measure']:3d}] "
-                      f"({start:5.1f}–{end:5.1f}s) Running pattern: {pattern_name}")
-            else:
-                print(f"[{start:5.2f}–{end:5.2f}] Running pattern: {pattern_name}")
-            
-            # Get pattern function
-            if not hasattr(patterns, pattern_name):
-                print(f"WARNING: Pattern '{pattern_name}' not found. Skipping.")
-                continue
-            
-            pattern_func = getattr(patterns, pattern_name)
-            args = section.get("options", {})
+            print(label)
             
-            # Run pattern in a non-blocking way
-            pattern_thread_done = False
-            
-            def run_pattern():
-                nonlocal pattern_thread_done
-                pattern_func(gpio, duration=duration, **args)
-                pattern_thread_done = True
-            
-            thread = threading.Thread(target=run_pattern, daemon=True)
-            thread.start()
+            # Hand the pattern to the worker
+            pattern_done.clear()
+            work_q.put((pattern_func, duration, args))
             
             # Update visualization while pattern runs
-            while not pattern_thread_done and running:
-                elapsed = time.time() - start_time
+            while not pattern_done.is_set() and running:
+                elapsed = (pygame.time.get_ticks() - start_ticks) / 1000.0
                 current_measure = int(seconds_to_measures(elapsed, bpm, beats_per_measure))
                 if not visualizer.update(gpio, pattern_name, elapsed, total_duration,
                                         current_measure, total_measures, bpm):
                     running = False
                     break
-                clock.tick(60)  # 60 FPS
-            
-            thread.join(timeout=0.1)
+                visualizer.tick()
         
         # Wait for music to finish if still playing
         if running:
             while pygame.mixer.music.get_busy():
-                elapsed = time.time() - start_time
+                elapsed = (pygame.time.get_ticks() - start_ticks) / 1000.0
                 current_measure = int(seconds_to_measures(elapsed, bpm, beats_per_measure))
                 if not visualizer.update(gpio, "Finished", elapsed, total_duration,
                                         current_measure, total_measures, bpm):
                     break
-                clock.tick(60)
+                visualizer.tick()
     
     finally:
         print("\nSimulation complete. Closing...")
@@ -447,8 +627,8 @@ def run_simulation(show, base_dir="."):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python3 show_simulator_measures.py <show_yaml_file>")
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python3 show_simulator_measures.py <show_yaml_file> [fps]")
         print("\nExample:")
         print("  python3 show_simulator_measures.py songs/christmas_eve_show.yaml")
         print("\nSupports both time-based and measure-based YAML files.")
@@ -462,4 +642,5 @@ if __name__ == "__main__":
     
     print(f"Loading show from {show_file}...")
     show_config, base_dir = load_show(show_file)
-    run_simulation(show_config, base_dir=base_dir)
\ No newline at end of file
+    fps = int(sys.argv[2]) if len(sys.argv) == 3 else 120
+    run_simulation(show_config, base_dir=base_dir, target_fps=fps)
\ No newline at end of file
@@ -4,6 +4,9 @@ import time
 import yaml
 from gpiozero import OutputDevice
 
+# libyaml-backed parser when PyYAML was built with it, same semantics as safe_load
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 CHANNEL_ORDER = [
     ("CH1 - T1 (Small Tree 1)", "T1"),
     ("CH2 - T2 (Small Tree 2)", "T2"),
@@ -17,13 +20,10 @@ CHANNEL_ORDER = [
 
 def load_channel_map(path="channel_map.yaml"):
     with open(path, "r") as f:
-        return yaml.safe_load(f)
-
-def get_gpio_for_zone(channel_map, zone_key):
-    # Trees are under channel_map["trees"], bulbs under channel_map["bulbs"]
-    trees = channel_map.get("trees", {})
-    bulbs = channel_map.get("bulbs", {})
+        return yaml.load(f, Loader=_YAML_LOADER)
 
+def get_gpio_for_zone(trees, bulbs, zone_key):
+    # trees is channel_map["trees"], bulbs is channel_map["bulbs"]
     if zone_key in trees:
         return trees[zone_key]
     if zone_key in bulbs:
@@ -33,12 +33,15 @@ def get_gpio_for_zone(channel_map, zone_key):
 
 def main():
     channel_map = load_channel_map()
+    trees = channel_map.get("trees", {})
+    bulbs = channel_map.get("bulbs", {})
 
-    devices = []
-    for label, zone_key in CHANNEL_ORDER:
-        gpio_pin = get_gpio_for_zone(channel_map, zone_key)
-        dev = OutputDevice(gpio_pin, active_high=True, initial_value=False)
-        devices.append((label, dev))
+    # Resolve every pin before opening any device, so a missing zone fails up front
+    pins = [get_gpio_for_zone(trees, bulbs, zone_key) for _, zone_key in CHANNEL_ORDER]
+    devices = [
+        (label, OutputDevice(gpio_pin, active_high=True, initial_value=False))
+        for (label, _), gpio_pin in zip(CHANNEL_ORDER, pins)
+    ]
 
     try:
         # Make sure everything starts OFF
@@ -1,35 +1,34 @@
 #!/usr/bin/env python3
 
+import os
 import time
 from gpio_controller import GPIOController
 import patterns
 
+# Pause between tests; set FAST_TESTS=1 to run them back to back
+DELAY = 0.0 if os.environ.get("FAST_TESTS") else 1.0
+
+# (pattern name, keyword arguments), run in this order
+TESTS = [
+    ("blink_all", {"duration": 4.0, "interval": 0.5}),
+    ("alternate_trees_and_bulbs", {"duration": 6.0, "interval": 0.4}),
+    ("wave_trees", {"duration": 6.0, "step_interval": 0.25}),
+    ("chase_bulbs", {"duration": 6.0, "step_interval": 0.2}),
+    ("sparkle", {"duration": 6.0, "interval": 0.08, "on_fraction": 0.5}),
+    ("finale_flash", {"duration": 3.0, "interval": 0.12}),
+]
+
 def main():
     gpio = GPIOController()
 
     try:
-        print("Test 1: blink_all")
-        patterns.blink_all(gpio, duration=4.0, interval=0.5)
-        time.sleep(1)
-
-        print("Test 2: alternate_trees_and_bulbs")
-        patterns.alternate_trees_and_bulbs(gpio, duration=6.0, interval=0.4)
-        time.sleep(1)
-
-        print("Test 3: wave_trees")
-        patterns.wave_trees(gpio, duration=6.0, step_interval=0.25)
-        time.sleep(1)
-
-        print("Test 4: chase_bulbs")
-        patterns.chase_bulbs(gpio, duration=6.0, step_interval=0.2)
-        time.sleep(1)
-
-        print("Test 5: sparkle")
-        patterns.sparkle(gpio, duration=6.0, interval=0.08, on_fraction=0.5)
-        time.sleep(1)
+        for i, (name, kwargs) in enumerate(TESTS, 1):
+            if i > 1:
+                gpio.all_off()
+                time.sleep(DELAY)
 
-        print("Test 6: finale_flash")
-        patterns.finale_flash(gpio, duration=3.0, interval=0.12)
+            print(f"Test {i}: {name}")
+            patterns.PATTERN_TABLE[name](gpio, **kwargs)
 
     finally:
         print("All off, exiting.")